@@ -24,22 +24,65 @@ from __future__ import annotations
 
 import argparse
 import base64
+import bisect
+import functools
+import gzip
 import hashlib
 import hmac
+import http.client
+import itertools
 import json
 import os
-import secrets
+import queue
+import random
+import re
 import sys
+import tempfile
 import time
-import urllib.error
 import urllib.parse
 import urllib.request
 from collections import defaultdict, OrderedDict
-from datetime import datetime
-from typing import Any, Dict, Iterable, Mapping
-
-
-API_BASE_URL = "https://api.bricklink.com/api/store/v1"
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Mapping
+
+try:
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+API_HOST = "api.bricklink.com"
+API_BASE_PATH = "/api/store/v1"
+API_BASE_URL = f"https://{API_HOST}{API_BASE_PATH}"
+REQUEST_TIMEOUT = 30
+DEFAULT_CACHE_TTL = 24 * 60 * 60
+# BrickLink starts throttling clients with more than five parallel requests.
+MAX_CONCURRENT_REQUESTS = 5
+# Transient failures (throttling, overloaded servers, dropped connections) are
+# retried with exponential backoff and jitter.
+MAX_ATTEMPTS = 5
+MAX_RETRY_DELAY = 30.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# ``\w`` matches exactly the characters for which ``str.isalnum()`` is true
+# plus the underscore.
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w-]")
+# Strings made only of unreserved characters are left unchanged by
+# percent-encoding, e.g. parameter names, "HMAC-SHA1" or timestamps.
+_URL_SAFE_TEXT = re.compile(r"[A-Za-z0-9_.~-]+")
+
+# Idle keep-alive connections to the BrickLink API. Reusing them avoids a fresh
+# TCP and TLS handshake for each of the price guide requests issued by ``main``.
+_CONNECTION_POOL: "queue.SimpleQueue[http.client.HTTPSConnection]" = queue.SimpleQueue()
+
+# Source of OAuth nonces; ``next()`` on the counter is atomic, so worker
+# threads never receive the same value.
+_NONCE_COUNTER = itertools.count(time.time_ns())
+
+# orjson parses bytes directly and is considerably faster than the standard
+# library; it is used when installed.
+_json_loads = orjson.loads if orjson is not None else json.loads
 
 
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
@@ -63,79 +106,396 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         "--currency-code",
         help="Optional currency code (e.g. EUR, USD). Defaults to your store currency.",
     )
+    parser.add_argument(
+        "--summary-only",
+        action="store_true",
+        help=(
+            "Only write average prices and monthly averages to the JSON file and "
+            "omit the individual price_detail entries."
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the on-disk response cache.",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached responses and fetch fresh data (the cache is updated).",
+    )
     return parser.parse_args(argv)
 
 
 def _percent_encode(value: Any) -> str:
     """Percent-encode a string for OAuth 1.0 signatures."""
 
-    return urllib.parse.quote(str(value), safe="~-._")
+    text = value if isinstance(value, str) else str(value)
+    if _URL_SAFE_TEXT.fullmatch(text):
+        return text
+    return urllib.parse.quote(text, safe="~-._")
+
+
+@functools.lru_cache(maxsize=256)
+def _percent_encode_static(text: str) -> str:
+    """Return ``_percent_encode(text)`` memoized for recurring strings.
+
+    Only for parameter names and values that repeat across requests; secrets
+    and per-request values such as the nonce go through ``_percent_encode``.
+    """
+
+    return _percent_encode(text)
+
+
+@functools.lru_cache(maxsize=1)
+def _signing_key(consumer_secret: str, token_secret: str) -> bytes:
+    """Return the HMAC-SHA1 signing key; it is identical for every request."""
+
+    return "&".join(
+        [_percent_encode(consumer_secret), _percent_encode(token_secret)]
+    ).encode("utf-8")
+
+
+@functools.lru_cache(maxsize=1)
+def _hmac_template(signing_key: bytes) -> "hmac.HMAC":
+    """Return a keyed HMAC-SHA1 object to be copied for each signature.
+
+    Copying skips the key padding and inner/outer pad setup that
+    ``hmac.new`` performs on every call. The template itself is never updated.
+    """
+
+    return hmac.new(signing_key, digestmod=hashlib.sha1)
+
+
+def _next_nonce() -> str:
+    """Return a nonce that is unique within this process.
+
+    OAuth only requires nonces not to repeat for the same timestamp, so a
+    counter seeded with the start time plus a few random bits is sufficient
+    and avoids a CSPRNG read per signature.
+    """
+
+    return f"{next(_NONCE_COUNTER):x}{random.getrandbits(32):08x}"
+
+
+@dataclass(frozen=True, slots=True)
+class _SignState:
+    """Percent-encoded OAuth parameters that are identical for every request.
+
+    The sorted static pairs are split around the positions of the per-request
+    ``oauth_nonce`` and ``oauth_timestamp`` pairs, so the Authorization header
+    can be assembled in sorted order without a sort. ``oauth_signature``
+    directly follows the nonce, as no static key sorts between the two.
+    """
+
+    before_nonce: tuple[tuple[str, str], ...]
+    before_timestamp: tuple[tuple[str, str], ...]
+    after_timestamp: tuple[tuple[str, str], ...]
+
+
+@functools.lru_cache(maxsize=1)
+def _sign_state(consumer_key: str, token_value: str) -> _SignState:
+    """Return the precomputed OAuth parameters shared by all requests."""
+
+    static_pairs = sorted(
+        (_percent_encode_static(key), _percent_encode_static(value))
+        for key, value in (
+            ("oauth_consumer_key", consumer_key),
+            ("oauth_signature_method", "HMAC-SHA1"),
+            ("oauth_token", token_value),
+            ("oauth_version", "1.0"),
+        )
+    )
+    keys = [key for key, _ in static_pairs]
+    nonce_index = bisect.bisect(keys, "oauth_nonce")
+    timestamp_index = bisect.bisect(keys, "oauth_timestamp")
+    return _SignState(
+        before_nonce=tuple(static_pairs[:nonce_index]),
+        before_timestamp=tuple(static_pairs[nonce_index:timestamp_index]),
+        after_timestamp=tuple(static_pairs[timestamp_index:]),
+    )
+
 
 def _build_oauth1_header(
     method: str,
     url: str,
-    params: Dict[str, Any],
+    encoded_params: Iterable[tuple[str, str]],
     consumer_key: str,
-    consumer_secret: str,
     token_value: str,
-    token_secret: str,
+    signing_key: bytes,
+    *,
+    nonce: str | None = None,
+    timestamp: str | None = None,
 ) -> str:
-    """Return the OAuth1 Authorization header value for the given request."""
-
-    oauth_params: Dict[str, Any] = {
-        "oauth_consumer_key": consumer_key,
-        "oauth_nonce": secrets.token_hex(16),
-        "oauth_signature_method": "HMAC-SHA1",
-        "oauth_timestamp": str(int(time.time())),
-        "oauth_token": token_value,
-        "oauth_version": "1.0",
-    }
+    """Return the OAuth1 Authorization header value for the given request.
+
+    *url* must be the normalized base URL without query string or fragment;
+    the query parameters are passed separately as percent-encoded
+    (key, value) pairs in *encoded_params*. *signing_key* is the value
+    returned by ``_signing_key``.
+    *nonce* and *timestamp* are generated when not supplied by the caller.
+    """
 
-    parsed_url = urllib.parse.urlsplit(url)
-    normalized_url = urllib.parse.urlunsplit(
-        (parsed_url.scheme, parsed_url.netloc, parsed_url.path, "", "")
+    # All pairs below are already percent-encoded and in sorted order; only
+    # the nonce, the timestamp and the signature differ between requests.
+    state = _sign_state(consumer_key, token_value)
+    nonce_pair = ("oauth_nonce", _percent_encode(nonce or _next_nonce()))
+    timestamp_pair = (
+        "oauth_timestamp",
+        _percent_encode(timestamp or str(int(time.time()))),
     )
 
-    signature_params = []
-    for key, value in params.items():
-        signature_params.append((_percent_encode(key), _percent_encode(value)))
-    for key, value in oauth_params.items():
-        signature_params.append((_percent_encode(key), _percent_encode(value)))
+    signature_params = list(encoded_params)
+    signature_params += (
+        *state.before_nonce,
+        nonce_pair,
+        *state.before_timestamp,
+        timestamp_pair,
+        *state.after_timestamp,
+    )
+    # Both halves are sorted runs, which the sort merges in a single pass.
     signature_params.sort()
 
-    parameter_string = "&".join(f"{key}={value}" for key, value in signature_params)
+    parameter_string = "&".join(map("=".join, signature_params))
     signature_base = "&".join(
         [
             method.upper(),
-            _percent_encode(normalized_url),
+            _percent_encode(url),
             _percent_encode(parameter_string),
         ]
     )
 
-    signing_key = "&".join(
-        [_percent_encode(consumer_secret), _percent_encode(token_secret)]
-    )
-    digest = hmac.new(
-        signing_key.encode("utf-8"), signature_base.encode("utf-8"), hashlib.sha1
-    ).digest()
+    signature = _hmac_template(signing_key).copy()
+    signature.update(signature_base.encode("utf-8"))
+    digest = signature.digest()
     oauth_signature = base64.b64encode(digest).decode("ascii")
 
-    oauth_params["oauth_signature"] = oauth_signature
-    header_params = ", ".join(
-        f"{key}=\"{_percent_encode(value)}\"" for key, value in sorted(oauth_params.items())
+    oauth_params = (
+        *state.before_nonce,
+        nonce_pair,
+        ("oauth_signature", _percent_encode(oauth_signature)),
+        *state.before_timestamp,
+        timestamp_pair,
+        *state.after_timestamp,
     )
+    header_params = ", ".join(f"{key}=\"{value}\"" for key, value in oauth_params)
     return f"OAuth {header_params}"
 
-def fetch_price_data(
+
+def _acquire_connection() -> http.client.HTTPSConnection:
+    """Return an idle pooled connection or open a new one."""
+
+    try:
+        return _CONNECTION_POOL.get_nowait()
+    except queue.Empty:
+        return _open_connection()
+
+
+def _open_connection() -> http.client.HTTPSConnection:
+    """Open a connection to the API, tunnelled through ``HTTPS_PROXY`` if set.
+
+    ``http.client`` ignores the proxy environment variables, so they are
+    resolved here the same way ``urllib.request`` does, including
+    ``NO_PROXY``.
+    """
+
+    proxy = urllib.request.getproxies().get("https")
+    if not proxy or urllib.request.proxy_bypass(API_HOST):
+        return http.client.HTTPSConnection(API_HOST, timeout=REQUEST_TIMEOUT)
+
+    if "://" not in proxy:
+        proxy = f"http://{proxy}"
+    proxy_url = urllib.parse.urlsplit(proxy)
+    tunnel_headers: Dict[str, str] = {}
+    if proxy_url.username is not None:
+        user_info = urllib.parse.unquote(proxy_url.username)
+        user_info += ":" + urllib.parse.unquote(proxy_url.password or "")
+        credentials = base64.b64encode(user_info.encode("utf-8")).decode("ascii")
+        tunnel_headers["Proxy-Authorization"] = f"Basic {credentials}"
+
+    connection = http.client.HTTPSConnection(
+        proxy_url.hostname,
+        proxy_url.port or 80,
+        timeout=REQUEST_TIMEOUT,
+    )
+    connection.set_tunnel(API_HOST, headers=tunnel_headers)
+    return connection
+
+
+def _close_connections() -> None:
+    """Close all idle pooled connections."""
+
+    while True:
+        try:
+            _CONNECTION_POOL.get_nowait().close()
+        except queue.Empty:
+            return
+
+
+class _ConnectionFailedError(RuntimeError):
+    """Raised when the BrickLink API cannot be reached at all."""
+
+
+def _send_request(
+    path: str, headers: Mapping[str, str]
+) -> tuple[int, http.client.HTTPMessage, bytes]:
+    """Send a GET request over a pooled keep-alive connection.
+
+    Returns the HTTP status code, the response headers and the (decompressed)
+    response body. A connection that the server closed while it was idle in
+    the pool is replaced once.
+    """
+
+    # Price guide payloads are large, repetitive JSON documents that shrink
+    # considerably when the server compresses them.
+    request_headers = {"Accept-Encoding": "gzip", **headers}
+    for attempt in range(2):
+        connection = _acquire_connection()
+        try:
+            connection.request("GET", path, headers=request_headers)
+            response = connection.getresponse()
+            payload = response.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as exc:
+            connection.close()
+            if attempt == 0:
+                continue
+            raise _ConnectionFailedError("Unable to reach the BrickLink API.") from exc
+        except (OSError, http.client.HTTPException) as exc:
+            connection.close()
+            raise _ConnectionFailedError("Unable to reach the BrickLink API.") from exc
+
+        if response.will_close:
+            connection.close()
+        else:
+            _CONNECTION_POOL.put(connection)
+
+        if (response.getheader("Content-Encoding") or "").lower() == "gzip":
+            try:
+                payload = gzip.decompress(payload)
+            except (OSError, EOFError) as exc:
+                raise RuntimeError("Failed to decompress the BrickLink API response.") from exc
+        return response.status, response.headers, payload
+
+    raise _ConnectionFailedError("Unable to reach the BrickLink API.")  # pragma: no cover
+
+
+def _retry_delay(attempt: int, retry_after: str | None) -> float:
+    """Return the seconds to wait before retry number *attempt* + 1.
+
+    A numeric ``Retry-After`` header takes precedence over the exponential
+    backoff; both are capped at ``MAX_RETRY_DELAY``.
+    """
+
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), MAX_RETRY_DELAY)
+        except ValueError:
+            pass
+    return min(2**attempt + random.uniform(0, 0.5), MAX_RETRY_DELAY)
+
+
+def _describe_http_error(status: int, error_body: bytes) -> str:
+    """Return a readable error message for a failed BrickLink API request."""
+
+    error_message = f"BrickLink API request failed with status {status}."
+    if error_body:
+        try:
+            error_payload = _json_loads(error_body)
+            meta = error_payload.get("meta") if isinstance(error_payload, dict) else None
+            meta_message = meta.get("message") if isinstance(meta, dict) else None
+            if meta_message:
+                error_message = f"{error_message} Message: {meta_message}."
+        except (ValueError, UnicodeDecodeError):
+            decoded_body = error_body.decode("utf-8", errors="replace").strip()
+            if decoded_body:
+                error_message = f"{error_message} Response: {decoded_body}."
+    return error_message
+
+
+def _cache_directory() -> Path:
+    """Return the directory holding cached BrickLink API responses."""
+
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join("~", ".cache")
+    return Path(base).expanduser() / "bricklink"
+
+
+def _cache_ttl() -> int:
+    """Return the cache lifetime in seconds from ``BRICKLINK_CACHE_TTL``."""
+
+    value = os.getenv("BRICKLINK_CACHE_TTL")
+    if not value:
+        return DEFAULT_CACHE_TTL
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise RuntimeError("BRICKLINK_CACHE_TTL must be a number of seconds.") from exc
+
+
+def _cache_path(
     item_type: str,
     item_no: str,
     guide_type: str,
     condition: str,
     currency_code: str | None,
-) -> Mapping[str, Any]:
-    """Return the price data payload for the given item and configuration.
+) -> Path:
+    """Return the cache file for the given price guide request."""
 
-    Raises ``RuntimeError`` if the API response does not contain the expected data.
+    key = "\0".join([item_type, item_no, guide_type, condition, currency_code or ""])
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return _cache_directory() / f"{digest}.json"
+
+
+@dataclass(frozen=True, slots=True)
+class _CacheEntry:
+    """A cached price guide response."""
+
+    price_data: Dict[str, Any]
+    etag: str | None
+    stored_at: float
+
+
+def _read_cache_entry(path: Path) -> _CacheEntry | None:
+    """Return the cache entry stored at *path*, regardless of its age."""
+
+    try:
+        stored_at = path.stat().st_mtime
+        entry = _json_loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(entry, dict) or not isinstance(entry.get("data"), dict):
+        return None
+    etag = entry.get("etag")
+    return _CacheEntry(
+        price_data=entry["data"],
+        etag=etag if isinstance(etag, str) else None,
+        stored_at=stored_at,
+    )
+
+
+def _write_cached_price_data(
+    path: Path, price_data: Mapping[str, Any], etag: str | None
+) -> None:
+    """Atomically store *price_data* and its *etag* at *path*; failures are ignored."""
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump({"etag": etag, "data": price_data}, file, ensure_ascii=False)
+            os.replace(temp_name, path)
+        except BaseException:
+            os.unlink(temp_name)
+            raise
+    except OSError:  # pragma: no cover - the cache is best effort
+        pass
+
+
+def load_credentials() -> tuple[str, str, str, str]:
+    """Return the BrickLink API credentials from the environment.
+
+    The tuple contains consumer key, consumer secret, token value and token
+    secret. Raises ``RuntimeError`` if any of them is missing.
     """
 
     consumer_key = os.getenv("BRICKLINK_CONSUMER_KEY")
@@ -157,64 +517,149 @@ def fetch_price_data(
         raise RuntimeError(
             "Missing BrickLink API credentials: " + ", ".join(missing)
         )
+    return consumer_key, consumer_secret, token_value, token_secret
+
+
+@dataclass(frozen=True, slots=True)
+class _RequestContext:
+    """Request data shared by all price guide lookups for one item."""
+
+    item_type: str
+    item_no: str
+    currency_code: str | None
+    path: str
+    url: str
+    consumer_key: str
+    token_value: str
+    signing_key: bytes
+
+
+def _build_request_context(
+    item_type: str,
+    item_no: str,
+    currency_code: str | None,
+    credentials: tuple[str, str, str, str],
+) -> _RequestContext:
+    """Normalize the item identifiers and prepare the signing material once."""
 
     normalized_item_type = item_type.upper()
     normalized_item_no = item_no
     if normalized_item_type == "SET" and "-" not in normalized_item_no:
         normalized_item_no = f"{normalized_item_no}-1"
 
-    url = f"{API_BASE_URL}/items/{normalized_item_type}/{normalized_item_no}/price"
+    consumer_key, consumer_secret, token_value, token_secret = credentials
+    path = f"{API_BASE_PATH}/items/{normalized_item_type}/{normalized_item_no}/price"
+    return _RequestContext(
+        item_type=normalized_item_type,
+        item_no=normalized_item_no,
+        currency_code=currency_code,
+        path=path,
+        url=f"https://{API_HOST}{path}",
+        consumer_key=consumer_key,
+        token_value=token_value,
+        signing_key=_signing_key(consumer_secret, token_secret),
+    )
+
+
+def _fetch_one(
+    context: _RequestContext,
+    guide_type: str,
+    condition: str,
+    *,
+    use_cache: bool = True,
+    refresh: bool = False,
+    nonce: str | None = None,
+    timestamp: str | None = None,
+) -> Dict[str, Any]:
+    """Return the price data for one guide type and condition of *context*.
+
+    Responses are cached on disk for ``BRICKLINK_CACHE_TTL`` seconds (default:
+    one day). Expired entries that carry an ETag are revalidated with a
+    conditional request and reused when the API answers ``304 Not Modified``.
+    ``use_cache=False`` bypasses the cache entirely, ``refresh=True`` skips the
+    lookup but still stores the fresh response. *nonce* and *timestamp* are
+    forwarded to the OAuth header.
+
+    Raises ``RuntimeError`` if the API response does not contain the expected data.
+    """
+
+    cache_path = None
+    cached_entry = None
+    if use_cache:
+        cache_path = _cache_path(
+            context.item_type,
+            context.item_no,
+            guide_type,
+            condition,
+            context.currency_code,
+        )
+        if not refresh:
+            cached_entry = _read_cache_entry(cache_path)
+            if cached_entry is not None and time.time() - cached_entry.stored_at <= _cache_ttl():
+                return cached_entry.price_data
+
     params: Dict[str, Any] = {
         "guide_type": guide_type,
         "new_or_used": condition,
     }
-    if currency_code:
-        params["currency_code"] = currency_code
-
-    query_string = urllib.parse.urlencode(sorted(params.items()))
-    request_url = f"{url}?{query_string}" if query_string else url
-    headers = {
-        "Authorization": _build_oauth1_header(
-            "GET",
-            url,
-            params,
-            consumer_key,
-            consumer_secret,
-            token_value,
-            token_secret,
-        )
-    }
-
-    request = urllib.request.Request(request_url, headers=headers, method="GET")
-
-    try:
-        with urllib.request.urlopen(request, timeout=30) as response:
-            payload = response.read()
-    except urllib.error.HTTPError as exc:
-        error_message = f"BrickLink API request failed with status {exc.code}."
+    if context.currency_code:
+        params["currency_code"] = context.currency_code
+
+    # Sorted and encoded once; the pairs are shared by the query string and
+    # the OAuth signature.
+    encoded_params = [
+        (_percent_encode_static(key), _percent_encode_static(str(value)))
+        for key, value in sorted(params.items())
+    ]
+    query_string = "&".join(map("=".join, encoded_params))
+    request_path = f"{context.path}?{query_string}" if query_string else context.path
+    conditional_headers: Dict[str, str] = {}
+    if cached_entry is not None and cached_entry.etag:
+        conditional_headers["If-None-Match"] = cached_entry.etag
+
+    for attempt in range(MAX_ATTEMPTS):
+        # Retries are signed again: BrickLink may reject a nonce it has seen.
+        headers = {
+            "Authorization": _build_oauth1_header(
+                "GET",
+                context.url,
+                encoded_params,
+                context.consumer_key,
+                context.token_value,
+                context.signing_key,
+                nonce=nonce if attempt == 0 else None,
+                timestamp=timestamp if attempt == 0 else None,
+            ),
+            **conditional_headers,
+        }
+        is_last_attempt = attempt == MAX_ATTEMPTS - 1
         try:
-            error_body = exc.read()
-        except Exception:  # pragma: no cover - best effort error reporting
-            error_body = b""
+            status, response_headers, payload = _send_request(request_path, headers)
+        except _ConnectionFailedError:
+            if is_last_attempt:
+                raise
+            delay = _retry_delay(attempt, None)
+        else:
+            if status not in RETRY_STATUSES or is_last_attempt:
+                break
+            delay = _retry_delay(attempt, response_headers.get("Retry-After"))
+        time.sleep(delay)
+
+    if status == 304 and cached_entry is not None:
+        # Unchanged on the server: restart the lifetime of the cached copy.
+        try:
+            os.utime(cache_path)
+        except OSError:  # pragma: no cover - the cache is best effort
+            pass
+        return cached_entry.price_data
 
-        if error_body:
-            try:
-                error_payload = json.loads(error_body.decode("utf-8"))
-                meta = error_payload.get("meta") if isinstance(error_payload, dict) else None
-                meta_message = meta.get("message") if isinstance(meta, dict) else None
-                if meta_message:
-                    error_message = f"{error_message} Message: {meta_message}."
-            except (ValueError, UnicodeDecodeError):
-                decoded_body = error_body.decode("utf-8", errors="replace").strip()
-                if decoded_body:
-                    error_message = f"{error_message} Response: {decoded_body}."
-
-        raise RuntimeError(error_message) from exc
-    except urllib.error.URLError as exc:
-        raise RuntimeError("Unable to reach the BrickLink API.") from exc
+    if status >= 400:
+        raise RuntimeError(_describe_http_error(status, payload))
 
     try:
-        data = json.loads(payload.decode("utf-8"))
+        # The parser accepts the raw bytes, which avoids holding a decoded copy
+        # of a potentially large price_detail payload next to the original.
+        data = _json_loads(payload)
     except (ValueError, UnicodeDecodeError) as exc:
         raise RuntimeError("Failed to decode BrickLink API response as JSON.") from exc
 
@@ -227,10 +672,39 @@ def fetch_price_data(
         price_data = data["data"]
         if not isinstance(price_data, dict):
             raise TypeError
-        return price_data
     except (KeyError, TypeError, ValueError) as exc:  # pragma: no cover - defensive
         raise RuntimeError("Unexpected API response format.") from exc
 
+    if cache_path is not None:
+        _write_cached_price_data(cache_path, price_data, response_headers.get("ETag"))
+    return price_data
+
+
+def fetch_price_data(
+    item_type: str,
+    item_no: str,
+    guide_type: str,
+    condition: str,
+    currency_code: str | None,
+    *,
+    use_cache: bool = True,
+    refresh: bool = False,
+) -> Mapping[str, Any]:
+    """Return the price data payload for the given item and configuration.
+
+    Credentials are read from the environment. See ``_fetch_one`` for the
+    caching behaviour.
+
+    Raises ``RuntimeError`` if the API response does not contain the expected data.
+    """
+
+    context = _build_request_context(
+        item_type, item_no, currency_code, load_credentials()
+    )
+    return _fetch_one(
+        context, guide_type, condition, use_cache=use_cache, refresh=refresh
+    )
+
 
 def _extract_average_price(price_data: Mapping[str, Any]) -> float:
     """Return the numeric average price from the BrickLink payload."""
@@ -252,10 +726,13 @@ def _compute_monthly_averages(
 ) -> "OrderedDict[str, float]":
     """Compute arithmetic mean of the unit prices grouped by month."""
 
-    monthly_totals: Dict[str, list[float]] = defaultdict(list)
+    # Running [sum, count] per month instead of a list of every unit price.
+    monthly_totals: Dict[str, list] = defaultdict(lambda: [0.0, 0])
 
     for entry in price_detail:
-        if not isinstance(entry, Mapping):
+        # Decoded JSON only contains plain dicts; testing the concrete type
+        # first skips the comparatively slow ABC check for every entry.
+        if type(entry) is not dict and not isinstance(entry, Mapping):
             continue
 
         date_str = entry.get(date_field)
@@ -263,13 +740,17 @@ def _compute_monthly_averages(
         if not date_str or unit_price in (None, ""):
             continue
 
+        # ISO 8601 timestamps start with the month key, so there is no need to
+        # build a datetime object just to format it back to "YYYY-MM".
         date_text = str(date_str)
-        if date_text.endswith("Z"):
-            date_text = date_text[:-1] + "+00:00"
-
-        try:
-            parsed_date = datetime.fromisoformat(date_text)
-        except ValueError:
+        month_key = date_text[:7]
+        if (
+            len(month_key) != 7
+            or month_key[4] != "-"
+            or not month_key[:4].isdigit()
+            or not month_key[5:].isdigit()
+            or not "01" <= month_key[5:] <= "12"
+        ):
             continue
 
         try:
@@ -277,22 +758,44 @@ def _compute_monthly_averages(
         except (TypeError, ValueError):
             continue
 
-        month_key = parsed_date.strftime("%Y-%m")
-        monthly_totals[month_key].append(unit_price_float)
-
-    ordered_months = OrderedDict()
-    for month in sorted(monthly_totals):
-        prices = monthly_totals[month]
-        if prices:
-            ordered_months[month] = sum(prices) / len(prices)
+        totals = monthly_totals[month_key]
+        totals[0] += unit_price_float
+        totals[1] += 1
 
-    return ordered_months
+    return OrderedDict(
+        (month, total / count)
+        for month, (total, count) in sorted(monthly_totals.items())
+        if count
+    )
 
 
 def _sanitize_filename_part(value: str) -> str:
     """Return a filesystem-friendly representation of the given identifier."""
 
-    return "".join(ch if ch.isalnum() or ch in {"-", "_"} else "-" for ch in value)
+    return _UNSAFE_FILENAME_CHARS.sub("-", value)
+
+
+def _write_output_orjson(output: Mapping[str, Any], file: BinaryIO) -> None:
+    """Write *output* as indented JSON, serializing one result at a time.
+
+    Only the encoding of a single price guide result is held in memory instead
+    of the whole document. The JSON is equivalent to ``json.dump(...,
+    indent=2)`` with the same layout, though floats may be spelled
+    differently (``1e-7`` instead of ``1e-07``). *output* must end with its
+    ``results`` mapping.
+    """
+
+    option = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+    header = {key: value for key, value in output.items() if key != "results"}
+    results = output["results"]
+
+    file.write(orjson.dumps(header, option=option)[:-2])
+    file.write(b',\n  "results": {')
+    for index, (key, result) in enumerate(results.items()):
+        file.write(b",\n    " if index else b"\n    ")
+        file.write(orjson.dumps(key) + b": ")
+        file.write(orjson.dumps(result, option=option).replace(b"\n", b"\n    "))
+    file.write(b"\n  }\n}" if results else b"}\n}")
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -307,30 +810,55 @@ def main(argv: list[str] | None = None) -> int:
 
     prices: Dict[tuple[str, str], Dict[str, Any]] = {}
     try:
-        for guide_type, condition in combinations:
-            price_data = fetch_price_data(
-                args.item_type,
-                args.item_no,
-                guide_type,
-                condition,
-                args.currency_code,
-            )
-            average_price = _extract_average_price(price_data)
-            price_detail = price_data.get("price_detail") or []
-            if guide_type == "sold":
-                monthly_averages = _compute_monthly_averages(
-                    price_detail, date_field="date_ordered"
-                )
-            else:
-                monthly_averages = OrderedDict()
-            prices[(guide_type, condition)] = {
-                "average_price": average_price,
-                "price_detail": price_detail,
-                "monthly_averages": monthly_averages,
+        context = _build_request_context(
+            args.item_type, args.item_no, args.currency_code, load_credentials()
+        )
+        # One timestamp is shared by all requests of this run.
+        timestamp = str(int(time.time()))
+        nonces = [_next_nonce() for _ in combinations]
+        # The four price guide requests are independent and network-bound, so
+        # they are issued concurrently; each worker borrows its own pooled
+        # connection.
+        with ThreadPoolExecutor(
+            max_workers=min(len(combinations), MAX_CONCURRENT_REQUESTS)
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _fetch_one,
+                    context,
+                    guide_type,
+                    condition,
+                    use_cache=not args.no_cache,
+                    refresh=args.refresh,
+                    nonce=nonce,
+                    timestamp=timestamp,
+                ): (guide_type, condition)
+                for (guide_type, condition), nonce in zip(combinations, nonces)
             }
+            for future in as_completed(futures):
+                guide_type, condition = futures[future]
+                price_data = future.result()
+                average_price = _extract_average_price(price_data)
+                price_detail = price_data.get("price_detail") or []
+                if guide_type == "sold":
+                    monthly_averages = _compute_monthly_averages(
+                        price_detail, date_field="date_ordered"
+                    )
+                else:
+                    monthly_averages = OrderedDict()
+                prices[(guide_type, condition)] = {
+                    "average_price": average_price,
+                    "price_detail": price_detail,
+                    "monthly_averages": monthly_averages,
+                }
     except Exception as exc:  # pragma: no cover - CLI error handling
         print(f"Error: {exc}", file=sys.stderr)
         return 1
+    finally:
+        _close_connections()
+
+    # Responses arrive in completion order; restore the fixed output order.
+    prices = {combination: prices[combination] for combination in combinations}
 
     condition_label = {"N": "New", "U": "Used"}
     for guide_type in ("stock", "sold"):
@@ -353,23 +881,30 @@ def main(argv: list[str] | None = None) -> int:
     sanitized_no = _sanitize_filename_part(args.item_no)
     filename = f"{sanitized_type}_{sanitized_no}.json"
 
+    results: Dict[str, Dict[str, Any]] = {}
+    for (guide_type, condition), data in prices.items():
+        result = {
+            "average_price": data["average_price"],
+            "monthly_averages": data["monthly_averages"],
+        }
+        if not args.summary_only:
+            result["price_detail"] = data["price_detail"]
+        results[f"{guide_type}_{condition}"] = result
+
     output = {
         "item_type": args.item_type,
         "item_no": args.item_no,
         "currency_code": args.currency_code,
-        "results": {
-            f"{guide_type}_{condition}": {
-                "average_price": data["average_price"],
-                "monthly_averages": data["monthly_averages"],
-                "price_detail": data["price_detail"],
-            }
-            for (guide_type, condition), data in prices.items()
-        },
+        "results": results,
     }
 
     try:
-        with open(filename, "w", encoding="utf-8") as file:
-            json.dump(output, file, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            with open(filename, "wb") as file:
+                _write_output_orjson(output, file)
+        else:
+            with open(filename, "w", encoding="utf-8") as file:
+                json.dump(output, file, indent=2, ensure_ascii=False)
     except OSError as exc:  # pragma: no cover - filesystem errors
         print(f"Error writing {filename}: {exc}", file=sys.stderr)
         return 1
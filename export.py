@@ -2,13 +2,17 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
+import functools
 import html
+import io
 import json
 import os
-from collections import defaultdict
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Sequence, Tuple
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Sequence, TextIO, Tuple
 
 try:
     from google.api_core import exceptions as google_api_exceptions
@@ -25,17 +29,65 @@ except ModuleNotFoundError as exc:  # pragma: no cover - import guard
 
 
 DEFAULT_COLLECTION = "bricklink_price_history"
-COLOR_PALETTE = [
+COLOR_PALETTE = (
     "#2563eb",  # blue-600
     "#16a34a",  # green-600
     "#f97316",  # orange-500
     "#7c3aed",  # violet-600
     "#dc2626",  # red-600
     "#0891b2",  # cyan-600
-]
+)
+# Leading "YYYY-MM" or "YYYY/MM" of a date string; single-digit months and
+# surrounding whitespace are accepted as well.
+_MONTH_PATTERN = re.compile(r"\s*(\d{4})[-/](\d{1,2})")
+# Fields holding the unit price of a price_detail entry, in order of preference.
+PRICE_FIELDS = ("unit_price", "price", "unit_sale_price")
+# Alternative field names of the item attributes, in order of preference.
+ITEM_NO_FIELDS = ("item_no", "item_id", "id")
+ITEM_NAME_FIELDS = ("item_name", "name")
+LAST_UPDATED_FIELDS = ("last_updated", "updated_at")
+# Document fields read by the export; everything else is left on the server.
+EXPORTED_FIELDS = (
+    "item_type",
+    *ITEM_NO_FIELDS,
+    *ITEM_NAME_FIELDS,
+    *LAST_UPDATED_FIELDS,
+    "results",
+)
+# Coordinate system of the server-side rendered price charts.
+CHART_WIDTH = 300
+CHART_HEIGHT = 80
+CHART_PADDING = 4
+# Documents requested per batched read when exporting selected IDs.
+GET_ALL_CHUNK_SIZE = 300
+MAX_READ_WORKERS = 8
 
 JsonObject = Dict[str, Any]
 
+_SECTION_TEMPLATE = (
+    "<section class=\"item-card\">"
+    "<div class=\"item-card__header\">"
+    "<h2 class=\"item-card__title\">{title}</h2>"
+    "<span class=\"item-card__subtitle\">{subtitle}</span>"
+    "</div>"
+    "<div class=\"item-card__content\">"
+    "<div class=\"card-column\">{info_html}{summary_html}</div>"
+    "<div class=\"chart-container\">{chart_placeholder}</div>"
+    "</div>"
+    "</section>"
+)
+_INFO_ROW_TEMPLATE = (
+    "<div class=\"info-row\">"
+    "<span class=\"info-label\">{label}:</span><span>{value}</span>"
+    "</div>"
+)
+_SUMMARY_ITEM_TEMPLATE = (
+    "<li class=\"summary-item\">"
+    "<span class=\"summary-key\">{key}:</span> "
+    "<span class=\"summary-values\">{values}</span>"
+    "</li>"
+)
+
 
 def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
     """Return parsed command line arguments."""
@@ -72,12 +124,30 @@ def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
         default=Path("export.html"),
         help="Zieldatei f\u00fcr die erzeugte HTML \u00dcbersicht (Standard: export.html).",
     )
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--ids-file",
+        type=Path,
+        help=(
+            "Datei mit Dokument-IDs (eine pro Zeile). Wenn angegeben, werden nur "
+            "diese Dokumente gelesen statt der gesamten Collection."
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "Anzahl paralleler Prozesse zum Erzeugen der Artikelkarten. Lohnt sich "
+            "bei gro\u00dfen Collections (Standard: 1)."
+        ),
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers muss mindestens 1 sein.")
+    return args
 
 
 def _validate_project_id(value: str, *, hint: str | None = None) -> str:
-    import re
-
     pattern = re.compile(r"^[a-z][a-z0-9-]{4,28}[a-z0-9]$")
     candidate = value.strip()
     if not candidate:
@@ -125,8 +195,10 @@ def _build_firestore_client(
         if credentials_project:
             credentials_project = _validate_project_id(credentials_project)
 
-        credentials = service_account.Credentials.from_service_account_file(
-            str(expanded)
+        # Build the credentials from the already parsed file instead of
+        # letting the library read and parse it a second time.
+        credentials = service_account.Credentials.from_service_account_info(
+            credentials_info
         )
         normalized_project = (
             _validate_project_id(project, hint=credentials_project)
@@ -150,11 +222,38 @@ def _build_firestore_client(
         ) from exc
 
 
+@functools.lru_cache(maxsize=4096)
+def _escape_text(text: str) -> str:
+    # Item types, currencies and result keys repeat across thousands of items.
+    return html.escape(text)
+
+
 def _escape(value: Any) -> str:
-    return html.escape(str(value)) if value is not None else ""
+    if value is None:
+        return ""
+    return _escape_text(value if isinstance(value, str) else str(value))
+
+
+@functools.lru_cache(maxsize=256)
+def _result_label(key: str) -> str:
+    # Result keys such as "sold_new" repeat for every item.
+    return key.replace("_", " ").title()
+
+
+def _first(item: Mapping[str, Any], fields: Sequence[str]) -> Any:
+    """Return the first truthy value of *fields* in *item*, or ``None``."""
+
+    for field in fields:
+        value = item.get(field)
+        if value:
+            return value
+    return None
 
 
 def _parse_float(value: Any) -> float | None:
+    # Firestore returns numeric prices as floats, so check that case first.
+    if type(value) is float:
+        return value
     if isinstance(value, (int, float)):
         return float(value)
     if isinstance(value, str):
@@ -169,12 +268,9 @@ def _normalize_month(value: Any) -> str | None:
     if not value:
         return None
     text = str(value)
-    for fmt in ("%Y-%m-%d", "%Y-%m", "%Y/%m/%d", "%Y/%m"):
-        try:
-            dt = datetime.strptime(text[: len(fmt)], fmt)
-            return dt.strftime("%Y-%m")
-        except ValueError:
-            continue
+    match = _MONTH_PATTERN.match(text)
+    if match and 1 <= (month := int(match[2])) <= 12:
+        return f"{match[1]}-{month:02d}"
     try:
         dt = datetime.fromisoformat(text)
     except ValueError:
@@ -183,185 +279,236 @@ def _normalize_month(value: Any) -> str | None:
 
 
 def _aggregate_price_details(details: Iterable[Mapping[str, Any]]) -> Dict[str, float]:
-    monthly_values: MutableMapping[str, List[float]] = defaultdict(list)
+    # A running [sum, count] pair per month keeps a single pass without
+    # building a list of prices for every month.
+    totals: Dict[str, List[float]] = {}
     for entry in details:
+        # Resolve the cheap price lookup first so the comparatively expensive
+        # date parsing only runs for entries that can contribute a value.
+        unit_price = None
+        for field in PRICE_FIELDS:
+            unit_price = _parse_float(entry.get(field))
+            if unit_price is not None:
+                break
+        if unit_price is None:
+            continue
         month = _normalize_month(entry.get("date_ordered"))
         if not month:
             continue
-        unit_price = _parse_float(entry.get("unit_price"))
-        if unit_price is None:
-            unit_price = _parse_float(entry.get("price"))
-        if unit_price is None:
-            unit_price = _parse_float(entry.get("unit_sale_price"))
-        if unit_price is None:
-            continue
-        monthly_values[month].append(unit_price)
+        total = totals.get(month)
+        if total is None:
+            totals[month] = [unit_price, 1]
+        else:
+            total[0] += unit_price
+            total[1] += 1
 
-    aggregated: Dict[str, float] = {}
-    for month, values in monthly_values.items():
-        if values:
-            aggregated[month] = sum(values) / len(values)
-    return dict(sorted(aggregated.items()))
+    return {month: total / count for month, (total, count) in sorted(totals.items())}
 
 
-def _build_chart_series(results: Mapping[str, Any]) -> Tuple[List[str], List[Dict[str, Any]]]:
+def _build_chart_series(
+    sorted_results: Iterable[Tuple[str, Mapping[str, Any]]]
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Return the months and chart datasets for the (key, payload) pairs."""
+
     series_data: List[Tuple[str, Dict[str, float], str]] = []
-    palette_cycle = iter(COLOR_PALETTE)
 
-    for key, payload in sorted(results.items()):
-        if not isinstance(payload, Mapping):
-            continue
+    for key, payload in sorted_results:
         price_detail = payload.get("price_detail")
         if not isinstance(price_detail, list):
             continue
         aggregated = _aggregate_price_details(price_detail)
         if not aggregated:
             continue
-        try:
-            color = next(palette_cycle)
-        except StopIteration:
-            palette_cycle = iter(COLOR_PALETTE)
-            color = next(palette_cycle)
-        label = key.replace("_", " ").title()
+        # Colors repeat once the palette is exhausted.
+        color = COLOR_PALETTE[len(series_data) % len(COLOR_PALETTE)]
+        label = _result_label(key)
         series_data.append((label, aggregated, color))
 
     if not series_data:
         return [], []
 
     all_months = sorted({month for _, data, _ in series_data for month in data})
+    # Place each series' values by month index; this touches only the months
+    # a series actually has instead of looking up every month for every series.
+    month_index = {month: index for index, month in enumerate(all_months)}
     datasets: List[Dict[str, Any]] = []
     for label, data, color in series_data:
-        datasets.append(
-            {
-                "label": label,
-                "data": [data.get(month) for month in all_months],
-                "borderColor": color,
-                "backgroundColor": color + "33",
-                "tension": 0.3,
-                "spanGaps": True,
-                "fill": False,
-            }
-        )
+        values: List[float | None] = [None] * len(all_months)
+        for month, value in data.items():
+            values[month_index[month]] = value
+        datasets.append({"label": label, "data": values, "color": color})
     return all_months, datasets
 
 
-def _format_result_summary(key: str, payload: Mapping[str, Any]) -> str | None:
-    summary_fields = []
+def _render_svg_chart(labels: Sequence[str], datasets: Sequence[Mapping[str, Any]]) -> str:
+    """Return an inline SVG line chart for the monthly price series.
+
+    Every dataset becomes one polyline; months without a value are skipped so
+    the line spans the gap. Each point carries a ``<title>`` element, which
+    browsers show as a tooltip without any client-side script.
+    """
+
+    values = [value for dataset in datasets for value in dataset["data"] if value is not None]
+    low = min(values)
+    high = max(values)
+    value_range = high - low
+    inner_width = CHART_WIDTH - 2 * CHART_PADDING
+    inner_height = CHART_HEIGHT - 2 * CHART_PADDING
+    x_step = inner_width / (len(labels) - 1) if len(labels) > 1 else 0.0
+
+    parts = [
+        f"<svg class=\"chart-svg\" viewBox=\"0 0 {CHART_WIDTH} {CHART_HEIGHT}\" "
+        "role=\"img\" aria-label=\"Monatliche Durchschnittspreise\">"
+    ]
+    for dataset in datasets:
+        color = dataset["color"]
+        escaped_label = _escape(dataset["label"])
+        points = []
+        markers = []
+        for index, value in enumerate(dataset["data"]):
+            if value is None:
+                continue
+            x = CHART_PADDING + index * x_step if len(labels) > 1 else CHART_WIDTH / 2
+            if value_range:
+                y = CHART_PADDING + (high - value) / value_range * inner_height
+            else:
+                y = CHART_HEIGHT / 2
+            points.append(f"{x:.1f},{y:.1f}")
+            markers.append(
+                f"<circle cx=\"{x:.1f}\" cy=\"{y:.1f}\" r=\"1.8\" fill=\"{color}\">"
+                f"<title>{escaped_label} {labels[index]}: {value:.2f}</title></circle>"
+            )
+        if len(points) > 1:
+            parts.append(
+                f"<polyline points=\"{' '.join(points)}\" fill=\"none\" "
+                f"stroke=\"{color}\" stroke-width=\"1.2\" stroke-linejoin=\"round\"/>"
+            )
+        parts.extend(markers)
+    parts.append("</svg>")
+
+    parts.append(
+        "<div class=\"chart-range\">"
+        f"<span>{labels[0]} \u2013 {labels[-1]}</span>"
+        f"<span>{low:.2f} \u2013 {high:.2f}</span>"
+        "</div>"
+    )
+    if len(datasets) > 1:
+        parts.append("<ul class=\"chart-legend\">")
+        for dataset in datasets:
+            parts.append(
+                f"<li><span class=\"chart-swatch\" style=\"background:{dataset['color']}\"></span>"
+                f"{_escape(dataset['label'])}</li>"
+            )
+        parts.append("</ul>")
+    return "".join(parts)
+
+
+class _ResultRow(NamedTuple):
+    """Summary values of one price guide result, parsed once."""
+
+    label: str
+    avg_price: Any
+    avg_price_value: float | None
+    total_qty: Any
+    qty_avg_price_value: float | None
+    currency: str | None
+
+
+def _build_result_row(key: str, payload: Mapping[str, Any]) -> _ResultRow:
     avg_price = payload.get("avg_price") or payload.get("avg_sale_price")
-    currency = payload.get("currency_code")
-    if avg_price is not None:
-        price_value = _parse_float(avg_price)
-        if price_value is not None and currency:
-            summary_fields.append(f"Durchschnitt: {price_value:.2f} {currency}")
-        elif price_value is not None:
-            summary_fields.append(f"Durchschnitt: {price_value:.2f}")
+    return _ResultRow(
+        label=_result_label(key),
+        avg_price=avg_price,
+        avg_price_value=_parse_float(avg_price),
+        total_qty=payload.get("total_qty") or payload.get("total_quantity"),
+        qty_avg_price_value=_parse_float(payload.get("qty_avg_price")),
+        currency=payload.get("currency_code"),
+    )
+
+
+def _format_result_summary(row: _ResultRow) -> str | None:
+    summary_fields = []
+    currency_suffix = f" {_escape(row.currency)}" if row.currency else ""
+    if row.avg_price is not None:
+        if row.avg_price_value is not None:
+            summary_fields.append(f"Durchschnitt: {row.avg_price_value:.2f}{currency_suffix}")
         else:
-            summary_fields.append(f"Durchschnitt: {_escape(avg_price)}")
+            summary_fields.append(f"Durchschnitt: {_escape(row.avg_price)}")
 
-    total_qty = payload.get("total_qty") or payload.get("total_quantity")
-    if total_qty is not None:
-        summary_fields.append(f"Menge: {_escape(total_qty)}")
+    if row.total_qty is not None:
+        summary_fields.append(f"Menge: {_escape(row.total_qty)}")
 
-    if payload.get("qty_avg_price") is not None:
-        qty_price = _parse_float(payload.get("qty_avg_price"))
-        if qty_price is not None and currency:
-            summary_fields.append(f"Durchschnitt (Menge): {qty_price:.2f} {currency}")
-        elif qty_price is not None:
-            summary_fields.append(f"Durchschnitt (Menge): {qty_price:.2f}")
+    if row.qty_avg_price_value is not None:
+        summary_fields.append(
+            f"Durchschnitt (Menge): {row.qty_avg_price_value:.2f}{currency_suffix}"
+        )
 
     if not summary_fields:
         return None
 
-    return (
-        "<li class=\"summary-item\">"
-        f"<span class=\"summary-key\">{_escape(key.replace('_', ' ').title())}:</span> "
-        f"<span class=\"summary-values\">{', '.join(summary_fields)}</span>"
-        "</li>"
+    return _SUMMARY_ITEM_TEMPLATE.format(
+        key=_escape(row.label),
+        values=", ".join(summary_fields),
     )
 
 
-def _render_item_section(item: Mapping[str, Any], index: int) -> Tuple[str, Dict[str, Any] | None]:
-    item_no = item.get("item_no") or item.get("item_id") or item.get("id")
-    item_name = item.get("item_name") or item.get("name")
+def _render_item_section(item: Mapping[str, Any]) -> str:
+    item_no = _first(item, ITEM_NO_FIELDS)
+    item_name = _first(item, ITEM_NAME_FIELDS)
     item_type = item.get("item_type") or "Unbekannt"
-    last_updated = item.get("last_updated") or item.get("updated_at")
+    last_updated = _first(item, LAST_UPDATED_FIELDS)
     results = item.get("results") if isinstance(item.get("results"), Mapping) else {}
 
-    labels, datasets = _build_chart_series(results)
-    chart_config: Dict[str, Any] | None = None
+    # Sorted once and shared by the chart and the summary list.
+    sorted_results = sorted(
+        (key, payload) for key, payload in results.items() if isinstance(payload, Mapping)
+    )
+    labels, datasets = _build_chart_series(sorted_results)
     chart_placeholder = (
         "<p class=\"chart-empty\">Keine historischen Preisdaten vorhanden.</p>"
     )
     if labels and datasets:
-        element_id = f"chart-{index}"
-        chart_config = {
-            "elementId": element_id,
-            "labels": labels,
-            "datasets": datasets,
-        }
-        chart_placeholder = (
-            f"<canvas id=\"{element_id}\" class=\"chart-canvas\"></canvas>"
-        )
+        chart_placeholder = _render_svg_chart(labels, datasets)
 
-    summary_html = ""
-    if results:
-        summary_items = []
-        for key, payload in sorted(results.items()):
-            if not isinstance(payload, Mapping):
-                continue
-            summary_item = _format_result_summary(key, payload)
-            if summary_item:
-                summary_items.append(summary_item)
-        if summary_items:
-            summary_html = (
-                "<ul class=\"summary-list\">"
-                + "".join(summary_items)
-                + "</ul>"
-            )
-    if not summary_html:
+    summary_items = [
+        summary_item
+        for key, payload in sorted_results
+        if (summary_item := _format_result_summary(_build_result_row(key, payload)))
+    ]
+    if summary_items:
+        summary_html = "<ul class=\"summary-list\">" + "".join(summary_items) + "</ul>"
+    else:
         summary_html = (
             "<p class=\"summary-empty\">Keine zusammengefassten Preisdaten verf\u00fcgbar.</p>"
         )
 
-    info_rows = [
-        "<div class=\"info-row\">"
-        f"<span class=\"info-label\">Nummer:</span><span>{_escape(item_no)}</span>"
-        "</div>",
-        "<div class=\"info-row\">"
-        f"<span class=\"info-label\">Typ:</span><span>{_escape(item_type)}</span>"
-        "</div>",
-    ]
+    # Each value is escaped once and reused in the header and the info rows.
+    escaped_no = _escape(item_no)
+    escaped_name = _escape(item_name) if item_name else ""
+    escaped_type = _escape(item_type)
+
+    info_fields = [("Nummer", escaped_no), ("Typ", escaped_type)]
     if item_name:
-        info_rows.append(
-            "<div class=\"info-row\">"
-            f"<span class=\"info-label\">Name:</span><span>{_escape(item_name)}</span>"
-            "</div>"
-        )
+        info_fields.append(("Name", escaped_name))
     if last_updated:
-        info_rows.append(
-            "<div class=\"info-row\">"
-            f"<span class=\"info-label\">Zuletzt aktualisiert:</span><span>{_escape(last_updated)}</span>"
-            "</div>"
-        )
-
+        info_fields.append(("Zuletzt aktualisiert", _escape(last_updated)))
     info_html = (
-        "<div class=\"info-grid\">" + "".join(info_rows) + "</div>"
+        "<div class=\"info-grid\">"
+        + "".join(
+            [_INFO_ROW_TEMPLATE.format(label=label, value=value) for label, value in info_fields]
+        )
+        + "</div>"
     )
 
-    section_html = (
-        "<section class=\"item-card\">"
-        "<div class=\"item-card__header\">"
-        f"<h2 class=\"item-card__title\">{_escape(item_no)}"
-        f"{f' - {_escape(item_name)}' if item_name else ''}</h2>"
-        f"<span class=\"item-card__subtitle\">{_escape(item_type)}</span>"
-        "</div>"
-        "<div class=\"item-card__content\">"
-        f"<div class=\"card-column\">{info_html}{summary_html}</div>"
-        f"<div class=\"chart-container\">{chart_placeholder}</div>"
-        "</div>"
-        "</section>"
+    return _SECTION_TEMPLATE.format_map(
+        {
+            "title": f"{escaped_no} - {escaped_name}" if item_name else escaped_no,
+            "subtitle": escaped_type,
+            "info_html": info_html,
+            "summary_html": summary_html,
+            "chart_placeholder": chart_placeholder,
+        }
     )
-    return section_html, chart_config
 
 
 def _render_documentation_notice() -> str:
@@ -373,98 +520,71 @@ def _render_documentation_notice() -> str:
     )
 
 
-def render_html(items: Sequence[Mapping[str, Any]]) -> str:
-    sections: List[str] = []
-    chart_configs: List[Dict[str, Any]] = []
-
-    for index, item in enumerate(items):
-        section_html, chart_config = _render_item_section(item, index)
-        sections.append(section_html)
-        if chart_config:
-            chart_configs.append(chart_config)
-
-    charts_json = json.dumps(chart_configs, ensure_ascii=False)
-    chart_data_json = charts_json.replace("</", "<\\/")
-
-    sections_html = "".join(sections) if sections else (
-        "<p class=\"empty-message\">Keine Dokumente in der Collection gefunden.</p>"
-    )
-
-    return f"""<!DOCTYPE html>
-<html lang=\"de\">
-<head>
-  <meta charset=\"utf-8\">
-  <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">
-  <title>BrickLink Preis\u00fcbersicht</title>
-  <link rel=\"preconnect\" href=\"https://fonts.googleapis.com\">
-  <link rel=\"preconnect\" href=\"https://fonts.gstatic.com\" crossorigin>
-  <link href=\"https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap\" rel=\"stylesheet\">
-  <script src=\"https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js\" defer></script>
-  <style>
-    :root {{
+# Static parts of the page around the item sections, built once at import.
+_PAGE_STYLE = """    :root {
       color-scheme: light;
       font-family: 'Inter', system-ui, -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
-    }}
-    *, *::before, *::after {{
+    }
+    *, *::before, *::after {
       box-sizing: border-box;
-    }}
-    body {{
+    }
+    body {
       margin: 0;
       min-height: 100vh;
       font-family: 'Inter', system-ui, -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
       color: #0f172a;
       background: linear-gradient(135deg, #f1f5f9 0%, #ffffff 55%, #e2e8f0 100%);
-    }}
-    .page-main {{
+    }
+    .page-main {
       max-width: 1120px;
       margin: 0 auto;
       padding: 3.5rem 1.5rem 4rem;
       display: flex;
       flex-direction: column;
       gap: 2.5rem;
-    }}
-    .page-header {{
+    }
+    .page-header {
       text-align: center;
       display: flex;
       flex-direction: column;
       gap: 0.75rem;
-    }}
-    .page-title {{
+    }
+    .page-title {
       margin: 0;
       font-size: clamp(2rem, 3vw, 2.75rem);
       font-weight: 700;
       letter-spacing: -0.01em;
       color: #0f172a;
-    }}
-    .page-subtitle {{
+    }
+    .page-subtitle {
       margin: 0 auto;
       max-width: 640px;
       font-size: 1rem;
       line-height: 1.6;
       color: #475569;
-    }}
-    .notice {{
+    }
+    .notice {
       max-width: 720px;
       margin: -0.5rem auto 0;
       font-size: 0.85rem;
       line-height: 1.5;
       color: #64748b;
       text-align: center;
-    }}
-    .item-grid {{
+    }
+    .item-grid {
       display: grid;
       gap: 1.75rem;
       grid-template-columns: repeat(auto-fit, minmax(420px, 1fr));
       justify-content: center;
-    }}
-    .empty-message {{
+    }
+    .empty-message {
       grid-column: 1 / -1;
       text-align: center;
       font-size: 1rem;
       color: #94a3b8;
       margin: 2rem 0;
-    }}
-    .item-card {{
+    }
+    .item-card {
       background: rgba(255, 255, 255, 0.92);
       border: 1px solid rgba(148, 163, 184, 0.35);
       border-radius: 1.25rem;
@@ -475,62 +595,62 @@ def render_html(items: Sequence[Mapping[str, Any]]) -> str:
       box-shadow: 0 18px 40px rgba(15, 23, 42, 0.1);
       backdrop-filter: blur(6px);
       transition: transform 0.2s ease, box-shadow 0.2s ease, border-color 0.2s ease;
-    }}
-    .item-card:hover {{
+    }
+    .item-card:hover {
       transform: translateY(-4px);
       border-color: rgba(148, 163, 184, 0.55);
       box-shadow: 0 24px 48px rgba(15, 23, 42, 0.15);
-    }}
-    .item-card__header {{
+    }
+    .item-card__header {
       display: flex;
       flex-direction: column;
       gap: 0.35rem;
-    }}
-    .item-card__title {{
+    }
+    .item-card__title {
       margin: 0;
       font-size: 1.25rem;
       font-weight: 600;
       letter-spacing: -0.01em;
       color: #1e293b;
-    }}
-    .item-card__subtitle {{
+    }
+    .item-card__subtitle {
       font-size: 0.85rem;
       text-transform: uppercase;
       letter-spacing: 0.08em;
       color: #64748b;
-    }}
-    .item-card__content {{
+    }
+    .item-card__content {
       display: grid;
       gap: 1.75rem;
       grid-template-columns: minmax(0, 1fr);
       align-items: start;
-    }}
-    @media (min-width: 768px) {{
-      .item-card__content {{
+    }
+    @media (min-width: 768px) {
+      .item-card__content {
         grid-template-columns: repeat(2, minmax(0, 1fr));
-      }}
-    }}
-    .card-column {{
+      }
+    }
+    .card-column {
       display: flex;
       flex-direction: column;
       gap: 1.25rem;
-    }}
-    .info-grid {{
+    }
+    .info-grid {
       display: grid;
       gap: 0.65rem;
       font-size: 0.95rem;
       color: #475569;
-    }}
-    .info-row {{
+    }
+    .info-row {
       display: flex;
       gap: 0.35rem;
       flex-wrap: wrap;
-    }}
-    .info-label {{
+    }
+    .info-label {
       font-weight: 600;
       color: #1f2937;
-    }}
-    .summary-list {{
+    }
+    .summary-list {
       list-style: none;
       margin: 0;
       padding: 1rem;
@@ -541,25 +661,25 @@ def render_html(items: Sequence[Mapping[str, Any]]) -> str:
       border: 1px solid rgba(203, 213, 225, 0.7);
       border-radius: 1rem;
       box-shadow: inset 0 1px 0 rgba(255, 255, 255, 0.6);
-    }}
-    .summary-item {{
+    }
+    .summary-item {
       display: flex;
       flex-direction: column;
       gap: 0.25rem;
-    }}
-    .summary-key {{
+    }
+    .summary-key {
       font-weight: 600;
       color: #1e293b;
-    }}
-    .summary-values {{
+    }
+    .summary-values {
       color: #475569;
-    }}
-    .summary-empty {{
+    }
+    .summary-empty {
       margin: 0;
       font-size: 0.95rem;
       color: #94a3b8;
-    }}
-    .chart-container {{
+    }
+    .chart-container {
       background: linear-gradient(135deg, rgba(248, 250, 252, 0.85), rgba(226, 232, 240, 0.65));
       border: 1px solid rgba(203, 213, 225, 0.8);
       border-radius: 1rem;
@@ -567,21 +687,63 @@ def render_html(items: Sequence[Mapping[str, Any]]) -> str:
       box-shadow: inset 0 1px 0 rgba(255, 255, 255, 0.65);
       min-height: 260px;
       display: flex;
-      align-items: center;
+      flex-direction: column;
+      align-items: stretch;
       justify-content: center;
+      gap: 0.75rem;
       grid-column: 1 / -1;
-    }}
-    .chart-canvas {{
+    }
+    .chart-svg {
       width: 100%;
-      height: 320px;
-    }}
-    .chart-empty {{
+      height: auto;
+      overflow: visible;
+    }
+    .chart-range {
+      display: flex;
+      justify-content: space-between;
+      font-size: 0.8rem;
+      color: #64748b;
+    }
+    .chart-legend {
+      list-style: none;
+      margin: 0;
+      padding: 0;
+      display: flex;
+      flex-wrap: wrap;
+      gap: 0.5rem 1rem;
+      font-size: 0.85rem;
+      color: #475569;
+    }
+    .chart-swatch {
+      display: inline-block;
+      width: 0.75rem;
+      height: 0.75rem;
+      margin-right: 0.35rem;
+      border-radius: 9999px;
+      vertical-align: middle;
+    }
+    .chart-empty {
       margin: 0;
       font-size: 0.9rem;
       color: #94a3b8;
       text-align: center;
-    }}
-  </style>
+    }
+"""
+
+_HTML_HEAD = (
+    """<!DOCTYPE html>
+<html lang=\"de\">
+<head>
+  <meta charset=\"utf-8\">
+  <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">
+  <title>BrickLink Preis\u00fcbersicht</title>
+  <link rel=\"preconnect\" href=\"https://fonts.googleapis.com\">
+  <link rel=\"preconnect\" href=\"https://fonts.gstatic.com\" crossorigin>
+  <link href=\"https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap\" rel=\"stylesheet\">
+  <style>
+"""
+    + _PAGE_STYLE
+    + """  </style>
 </head>
 <body>
   <main class=\"page-main\">
@@ -589,86 +751,171 @@ def render_html(items: Sequence[Mapping[str, Any]]) -> str:
       <h1 class=\"page-title\">BrickLink Preis\u00fcbersicht</h1>
       <p class=\"page-subtitle\">Automatisch generierte HTML-Auswertung aller in Firestore gespeicherten Artikel.</p>
     </header>
-    {_render_documentation_notice()}
-    <div class=\"item-grid\">{sections_html}</div>
+    """
+    + _render_documentation_notice()
+    + """
+    <div class=\"item-grid\">"""
+)
+
+_HTML_TAIL = """</div>
   </main>
-  <script>
-    document.addEventListener('DOMContentLoaded', () => {{
-      const charts = {chart_data_json};
-      charts.forEach((config) => {{
-        const canvas = document.getElementById(config.elementId);
-        if (!canvas) {{
-          return;
-        }}
-        new window.Chart(canvas, {{
-          type: 'line',
-          data: {{
-            labels: config.labels,
-            datasets: config.datasets.map((dataset) => ({{
-              ...dataset,
-              data: dataset.data.map((value) => (value === null || value === undefined) ? null : Number(value)),
-            }})),
-          }},
-          options: {{
-            responsive: true,
-            maintainAspectRatio: false,
-            interaction: {{ mode: 'index', intersect: false }},
-            plugins: {{
-              legend: {{ display: config.datasets.length > 1 }},
-              tooltip: {{
-                callbacks: {{
-                  label: (context) => {{
-                    const value = context.parsed.y;
-                    if (value === null || value === undefined) {{
-                      return `${{context.dataset.label}}: keine Daten`;
-                    }}
-                    return `${{context.dataset.label}}: ${{value.toFixed(2)}}`;
-                  }},
-                }},
-              }},
-            }},
-            scales: {{
-              y: {{
-                ticks: {{ callback: (value) => value.toFixed ? value.toFixed(2) : value }},
-                beginAtZero: false,
-              }},
-            }},
-          }},
-        }});
-      }});
-    }});
-  </script>
 </body>
 </html>
 """
 
 
+def render_html(items: Iterable[Mapping[str, Any]], *, workers: int = 1) -> str:
+    buffer = io.StringIO()
+    write_html(items, buffer, workers=workers)
+    return buffer.getvalue()
+
+
+def write_html(
+    items: Iterable[Mapping[str, Any]], file: TextIO, *, workers: int = 1
+) -> None:
+    """Write the HTML overview for *items* to *file* section by section.
+
+    The rendered item sections, including their SVG charts, are written out
+    immediately. With *workers* greater than one the sections are rendered in
+    a process pool, which pays off for large collections because rendering is
+    CPU-bound.
+    """
+
+    file.write(_HTML_HEAD)
+
+    has_items = False
+    with contextlib.ExitStack() as stack:
+        if workers > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            rendered = executor.map(_render_item_section, items, chunksize=16)
+        else:
+            rendered = map(_render_item_section, items)
+        for section_html in rendered:
+            has_items = True
+            file.write(section_html)
+    if not has_items:
+        file.write(
+            "<p class=\"empty-message\">Keine Dokumente in der Collection gefunden.</p>"
+        )
+
+    file.write(_HTML_TAIL)
+
+
+def _sort_items(items: List[JsonObject]) -> None:
+    items.sort(key=lambda item: (str(item.get("item_type") or ""), str(item.get("item_no") or item.get("id") or "")))
+
+
+def _read_document_ids(path: Path) -> List[str]:
+    """Return the unique, non-empty document IDs listed in *path*."""
+
+    expanded = path.expanduser()
+    try:
+        with expanded.open("r", encoding="utf-8") as file:
+            lines = [line.strip() for line in file]
+    except OSError as exc:
+        raise SystemExit(f"Die ID-Datei {expanded} konnte nicht gelesen werden: {exc}") from exc
+    return list(dict.fromkeys(line for line in lines if line))
+
+
+def _fetch_items_by_id(
+    db: firestore.Client, collection: str, document_ids: Sequence[str]
+) -> List[JsonObject]:
+    """Read only the given documents using batched ``get_all`` calls.
+
+    The IDs are split into chunks of ``GET_ALL_CHUNK_SIZE`` and the chunks are
+    requested concurrently; documents that do not exist are skipped.
+    """
+
+    collection_ref = db.collection(collection)
+    chunks = [
+        document_ids[start : start + GET_ALL_CHUNK_SIZE]
+        for start in range(0, len(document_ids), GET_ALL_CHUNK_SIZE)
+    ]
+
+    def _fetch_chunk(chunk: Sequence[str]) -> List[JsonObject]:
+        references = [collection_ref.document(document_id) for document_id in chunk]
+        chunk_items: List[JsonObject] = []
+        for snapshot in db.get_all(references, field_paths=EXPORTED_FIELDS):
+            if not snapshot.exists:
+                continue
+            data = snapshot.to_dict() or {}
+            data.setdefault("id", snapshot.id)
+            chunk_items.append(data)
+        return chunk_items
+
+    items: List[JsonObject] = []
+    if chunks:
+        try:
+            with ThreadPoolExecutor(max_workers=min(len(chunks), MAX_READ_WORKERS)) as executor:
+                for chunk_items in executor.map(_fetch_chunk, chunks):
+                    items.extend(chunk_items)
+        except google_api_exceptions.PermissionDenied as exc:
+            raise SystemExit(
+                "Kein Zugriff auf das Firestore-Projekt. Pr\u00fcfe Berechtigungen und Projekt-ID."
+            ) from exc
+
+    missing = len(document_ids) - len(items)
+    if missing:
+        print(f"Hinweis: {missing} Dokument(e) aus der ID-Datei wurden nicht gefunden.")
+    _sort_items(items)
+    return items
+
+
 def _fetch_items(db: firestore.Client, collection: str) -> List[JsonObject]:
+    """Read the whole collection, as concurrent partitions if it is top-level.
+
+    For a top-level collection the ID ranges come from a Firestore partition
+    query, so they follow the actual distribution of the documents. Partition
+    queries work on collection groups: documents of same-named subcollections
+    are read as well and then discarded. Subcollection paths (containing
+    ``/``) cannot be partitioned this way and are streamed in a single query.
+    """
+
+    def _fetch_query(query: Any, top_level_only: bool = True) -> List[JsonObject]:
+        # Convert the snapshots while streaming instead of keeping them
+        # alongside the converted dictionaries.
+        shard_items: List[JsonObject] = []
+        for doc in query.select(EXPORTED_FIELDS).stream():
+            if top_level_only and doc.reference.parent.parent is not None:
+                continue
+            data = doc.to_dict() or {}
+            data.setdefault("id", doc.id)
+            shard_items.append(data)
+        return shard_items
+
+    items: List[JsonObject] = []
     try:
-        documents = list(db.collection(collection).stream())
+        if "/" in collection:
+            items = _fetch_query(db.collection(collection), top_level_only=False)
+        else:
+            partitions = db.collection_group(collection).get_partitions(MAX_READ_WORKERS)
+            queries = [partition.query() for partition in partitions]
+            with ThreadPoolExecutor(max_workers=max(1, len(queries))) as executor:
+                for shard_items in executor.map(_fetch_query, queries):
+                    items.extend(shard_items)
     except google_api_exceptions.PermissionDenied as exc:
         raise SystemExit(
             "Kein Zugriff auf das Firestore-Projekt. Pr\u00fcfe Berechtigungen und Projekt-ID."
         ) from exc
 
-    items: List[JsonObject] = []
-    for doc in documents:
-        data = doc.to_dict() or {}
-        data.setdefault("id", doc.id)
-        items.append(data)
-    items.sort(key=lambda item: (str(item.get("item_type") or ""), str(item.get("item_no") or item.get("id") or "")))
+    _sort_items(items)
     return items
 
 
 def main(argv: Sequence[str] | None = None) -> int:
     args = parse_args(argv)
+    document_ids = _read_document_ids(args.ids_file) if args.ids_file else None
 
     db = _build_firestore_client(project=args.project, credentials_path=args.credentials)
-    items = _fetch_items(db, args.collection)
-    html_output = render_html(items)
+    if document_ids is not None:
+        items = _fetch_items_by_id(db, args.collection, document_ids)
+    else:
+        items = _fetch_items(db, args.collection)
 
     output_path = args.output.expanduser().resolve()
-    output_path.write_text(html_output, encoding="utf-8")
+    # A large buffer turns the many small section writes into few system calls.
+    with output_path.open("w", encoding="utf-8", buffering=1 << 20) as file:
+        write_html(items, file, workers=args.workers)
     print(f"HTML-\u00dcbersicht in {output_path} gespeichert.")
     return 0
 
@@ -2,47 +2,112 @@
 from __future__ import annotations
 
 import argparse
+import functools
+import hashlib
 import json
+import mmap
+import operator
 import os
 import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Mapping, Tuple
 
-try:
-    from google.api_core import exceptions as google_api_exceptions
+# The Google client libraries take a noticeable time to import; they are
+# loaded in _create_firestore_client, so a run without files skips them.
+if TYPE_CHECKING:  # pragma: no cover - typing only
     from google.cloud import firestore
-    from google.auth import exceptions as google_auth_exceptions
-    from google.oauth2 import service_account
-except ModuleNotFoundError as exc:  # pragma: no cover - import guard
-    raise SystemExit(
-        "Das Paket 'google-cloud-firestore' ist nicht installiert. "
-        "Installiere die Abhängigkeiten z. B. mit einem virtuellen Umfeld:\n"
-        "    python3 -m venv .venv && source .venv/bin/activate\n"
-        "    python -m pip install -r requirements.txt"
-    ) from exc
+
+try:
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import ujson
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    ujson = None
 
 
 DEFAULT_COLLECTION = "bricklink_price_history"
 _PROJECT_ID_PATTERN = re.compile(r"^[a-z][a-z0-9-]{4,28}[a-z0-9]$")
+MAX_READ_WORKERS = 32
+# Firestore accepts at most 500 writes per batch.
+MAX_BATCH_SIZE = 500
+# Documents requested per batched read.
+GET_ALL_CHUNK_SIZE = 300
+# Concurrent batched reads and batch commits; the client is thread-safe and
+# the calls spend their time waiting on the network.
+MAX_FIRESTORE_WORKERS = 16
+_READ_DENIED_MESSAGE = (
+    "Kein Zugriff auf das Firestore-Projekt. Prüfe, ob der Service-Account "
+    "für das Projekt berechtigt ist und ob die Firestore API aktiviert ist."
+)
+_WRITE_DENIED_MESSAGE = (
+    "Schreibzugriff auf Firestore verweigert. Stelle sicher, dass der Service-Account "
+    "mindestens die Rolle 'Datastore User' besitzt."
+)
 
 
 JsonObject = Dict[str, Any]
 
+# Clients by (project, credentials path, GOOGLE_APPLICATION_CREDENTIALS), so
+# repeated ``main`` calls in one process reuse the already open gRPC channel.
+_CLIENT_CACHE: Dict[Tuple[str | None, Path | None, str | None], firestore.Client] = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
 
-def _load_json_files(directory: Path) -> List[Tuple[Path, JsonObject]]:
-    """Return a list of (path, data) tuples for JSON files in *directory*."""
+# Fastest available parser: orjson, then ujson, then the standard library.
+if orjson is not None:
+    _json_loads = orjson.loads
+elif ujson is not None:
+    _json_loads = ujson.loads
+else:
+    _json_loads = json.loads
 
-    json_files: List[Tuple[Path, JsonObject]] = []
-    for path in sorted(directory.glob("*.json")):
-        try:
-            with path.open("r", encoding="utf-8") as file:
-                data = json.load(file)
-        except json.JSONDecodeError as exc:
-            raise RuntimeError(f"Fehler beim Lesen von {path.name}: {exc}") from exc
-        json_files.append((path, data))
-    return json_files
 
+def _read_json_file(path: Path) -> Tuple[Path, JsonObject, str]:
+    """Return (path, data, sha256 hex digest) for the JSON file at *path*.
+
+    With orjson the file is memory-mapped and parsed and hashed straight from
+    the mapped pages instead of an intermediate ``bytes`` copy.
+    """
+
+    try:
+        with path.open("rb") as file:
+            if orjson is not None and os.fstat(file.fileno()).st_size:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    with memoryview(mapped) as view:
+                        return path, orjson.loads(view), hashlib.sha256(view).hexdigest()
+            content = file.read()
+        return path, _json_loads(content), hashlib.sha256(content).hexdigest()
+    except ValueError as exc:  # includes JSON and UTF-8 decoding errors
+        raise RuntimeError(f"Fehler beim Lesen von {path.name}: {exc}") from exc
+
+
+def _load_json_files(directory: Path) -> List[Tuple[Path, JsonObject, str]]:
+    """Return (path, data, sha256 hex digest) tuples for JSON files in *directory*."""
+
+    # ``scandir`` reuses the file type from the directory listing instead of
+    # building a ``Path`` and calling ``stat`` for every entry.
+    with os.scandir(directory) as entries:
+        names = sorted(
+            entry.name
+            for entry in entries
+            if entry.name.endswith(".json") and entry.is_file()
+        )
+    paths = [directory / name for name in names]
+    if not paths:
+        return []
 
+    # Reading is I/O-bound, so the files are loaded concurrently; ``map`` keeps
+    # the sorted order, so the first broken file is reported.
+    with ThreadPoolExecutor(max_workers=min(len(paths), MAX_READ_WORKERS)) as executor:
+        return list(executor.map(_read_json_file, paths))
+
+
+@functools.lru_cache(maxsize=4096)
 def _sanitize_document_id(item_type: str, item_no: str) -> str:
     """Return a safe Firestore document id."""
 
@@ -57,38 +122,19 @@ def _merge_sold_price_details(
 ) -> List[JsonObject]:
     """Merge sold price details ensuring unique ``date_ordered`` entries."""
 
-    merged: List[JsonObject] = []
-    seen_dates = set()
-
-    if existing:
-        for entry in existing:
-            date = entry.get("date_ordered")
-            if date is None:
-                continue
-            if date not in seen_dates:
-                seen_dates.add(date)
-                merged.append(entry)
-
-    if new:
-        for entry in new:
+    # Keyed by date; the first entry for a date wins, existing ones first.
+    by_date: Dict[Any, JsonObject] = {}
+    for entries in (existing, new):
+        for entry in entries or ():
             date = entry.get("date_ordered")
-            if date is None or date in seen_dates:
-                continue
-            seen_dates.add(date)
-            merged.append(entry)
+            if date is not None:
+                by_date.setdefault(date, entry)
 
-    merged.sort(key=lambda item: item.get("date_ordered") or "")
-    return merged
+    return sorted(by_date.values(), key=operator.itemgetter("date_ordered"))
 
 
-def sync_file(
-    db: firestore.Client,
-    path: Path,
-    data: JsonObject,
-    *,
-    collection: str,
-) -> None:
-    """Synchronize the JSON payload from *path* to Firestore."""
+def _document_id(path: Path, data: JsonObject) -> str:
+    """Return the Firestore document id for the payload read from *path*."""
 
     item_type = data.get("item_type")
     item_no = data.get("item_no")
@@ -98,44 +144,243 @@ def sync_file(
             f"Datei {path.name} enthält keine gültigen 'item_type'/'item_no' Werte."
         )
 
-    document_id = _sanitize_document_id(str(item_type), str(item_no))
-    doc_ref = db.collection(collection).document(document_id)
+    return _sanitize_document_id(str(item_type), str(item_no))
 
-    try:
-        existing_snapshot = doc_ref.get()
-    except google_api_exceptions.PermissionDenied as exc:
-        raise SystemExit(
-            "Kein Zugriff auf das Firestore-Projekt. Prüfe, ob der Service-Account "
-            "für das Projekt berechtigt ist und ob die Firestore API aktiviert ist."
-        ) from exc
 
-    existing_data = existing_snapshot.to_dict() if existing_snapshot.exists else {}
-    existing_results: Dict[str, JsonObject] = dict(existing_data.get("results", {}))
+def _merge_document(
+    path: Path,
+    data: JsonObject,
+    existing_data: JsonObject,
+    source_sha256: str | None = None,
+) -> JsonObject:
+    """Return the document to store for *data* on top of *existing_data*.
+
+    *source_sha256* is the digest of the file contents; it is stored so that
+    later runs can recognize an unchanged file.
+    """
+
+    existing_results: Dict[str, JsonObject] = existing_data.get("results", {})
 
-    merged_results: Dict[str, JsonObject] = dict(existing_results)
+    merged_results: Dict[str, JsonObject] = existing_results.copy()
     new_results = data.get("results", {})
     for key, payload in new_results.items():
-        new_payload = dict(payload)
-        if key.startswith("sold"):
-            merged_detail = _merge_sold_price_details(
+        if key[:4] != "sold":
+            # Stored as read; nothing modifies it, so no copy is needed.
+            merged_results[key] = payload
+            continue
+        merged_results[key] = {
+            **payload,
+            "price_detail": _merge_sold_price_details(
                 existing_results.get(key, {}).get("price_detail"),
-                new_payload.get("price_detail"),
-            )
-            new_payload["price_detail"] = merged_detail
-        merged_results[key] = new_payload
+                payload.get("price_detail"),
+            ),
+        }
 
-    payload_to_store: JsonObject = dict(existing_data)
-    payload_to_store.update(data)
-    payload_to_store["results"] = merged_results
-    payload_to_store["source_file"] = str(path.resolve())
+    return {
+        **existing_data,
+        **data,
+        "results": merged_results,
+        "source_file": str(path.resolve()),
+        "source_sha256": source_sha256,
+    }
 
-    try:
-        doc_ref.set(payload_to_store, merge=True)
-    except google_api_exceptions.PermissionDenied as exc:
+
+def _changed_fields(
+    existing: Mapping[str, Any], payload: Mapping[str, Any], prefix: Tuple[str, ...] = ()
+) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    """Yield (field path, value) for every leaf of *payload* that differs.
+
+    Nested maps are compared key by key, which matches how ``set(...,
+    merge=True)`` applies them; any other value, including an empty map, is
+    replaced as a whole.
+    """
+
+    for key, value in payload.items():
+        path = (*prefix, key)
+        if key not in existing:
+            yield path, value
+            continue
+        old_value = existing[key]
+        if value and isinstance(value, dict) and isinstance(old_value, dict):
+            yield from _changed_fields(old_value, value, path)
+        elif old_value != value:
+            yield path, value
+
+
+def _field_updates(
+    db: firestore.Client, existing: Mapping[str, Any], payload: Mapping[str, Any]
+) -> Dict[str, Any]:
+    """Return the ``update()`` mapping that turns *existing* into *payload*."""
+
+    return {db.field_path(*path): value for path, value in _changed_fields(existing, payload)}
+
+
+def _needs_existing_data(data: JsonObject) -> bool:
+    """Return whether *data* has sold results to merge with the stored ones."""
+
+    return any(key[:4] == "sold" for key in data.get("results", {}))
+
+
+def _apply_write(
+    target: Any, doc_ref: firestore.DocumentReference, fields: JsonObject, mode: str
+) -> None:
+    """Apply a ``"set"``, ``"merge"`` or ``"update"`` write of *fields*.
+
+    *target* is either a ``WriteBatch`` or *doc_ref* itself, so batched and
+    single-document writes go through the same branches.
+    """
+
+    args = (fields,) if target is doc_ref else (doc_ref, fields)
+    if mode == "update":
+        target.update(*args)
+    else:
+        target.set(*args, merge=mode == "merge")
+
+
+def sync_file(
+    db: firestore.Client,
+    path: Path,
+    data: JsonObject,
+    *,
+    collection: str,
+    source_sha256: str | None = None,
+) -> None:
+    """Synchronize the JSON payload from *path* to Firestore via ``sync_files``.
+
+    Without *source_sha256* the digest of the file at *path* is used.
+    """
+
+    if source_sha256 is None:
+        source_sha256 = hashlib.sha256(path.read_bytes()).hexdigest()
+    sync_files(db, [(path, data, source_sha256)], collection=collection)
+
+
+def sync_files(
+    db: firestore.Client,
+    json_files: Iterable[Tuple[Path, JsonObject, str]],
+    *,
+    collection: str,
+) -> None:
+    """Sync (path, data, sha256) *json_files*, skipping unchanged single-source documents."""
+
+    from google.api_core import exceptions as google_api_exceptions
+
+    collection_ref = db.collection(collection)
+    files = [
+        (path, data, digest, _document_id(path, data)) for path, data, digest in json_files
+    ]
+    if not files:
+        return
+
+    def _read_chunk(
+        document_ids: List[str], field_paths: List[str] | None
+    ) -> List[Tuple[str, JsonObject]]:
+        references = [collection_ref.document(document_id) for document_id in document_ids]
+        return [
+            (snapshot.id, snapshot.to_dict() or {})
+            for snapshot in db.get_all(references, field_paths=field_paths)
+            if snapshot.exists
+        ]
+
+    def _commit_chunk(writes: List[Tuple[str, JsonObject, str]]) -> List[str]:
+        """Commit *writes* as one batch and return the ids that failed."""
+
+        batch = db.batch()
+        for document_id, fields, mode in writes:
+            doc_ref = collection_ref.document(document_id)
+            _apply_write(batch, doc_ref, fields, mode)
+        try:
+            batch.commit()
+            return []
+        except google_api_exceptions.PermissionDenied:
+            raise
+        except google_api_exceptions.GoogleAPICallError:
+            pass
+
+        # A batch fails as a whole; write its documents one by one so that a
+        # single rejected document does not hold back the others.
+        failed: List[str] = []
+        for document_id, fields, mode in writes:
+            doc_ref = collection_ref.document(document_id)
+            try:
+                _apply_write(doc_ref, doc_ref, fields, mode)
+            except google_api_exceptions.PermissionDenied:
+                raise
+            except google_api_exceptions.GoogleAPICallError as exc:
+                print(f"Fehler beim Schreiben von {document_id}: {exc}")
+                failed.append(document_id)
+        return failed
+
+    files_per_document = Counter(document_id for *_, document_id in files)
+    # Only documents with sold results to merge need their stored data; for
+    # the others the stored hash is enough to skip unchanged files.
+    merge_ids = {
+        document_id for _, data, _, document_id in files if _needs_existing_data(data)
+    }
+    full_ids = [document_id for document_id in files_per_document if document_id in merge_ids]
+    hash_ids = [document_id for document_id in files_per_document if document_id not in merge_ids]
+    read_chunks: List[List[str]] = []
+    chunk_field_paths: List[List[str] | None] = []
+    for document_ids, field_paths in ((full_ids, None), (hash_ids, ["source_sha256"])):
+        for start in range(0, len(document_ids), GET_ALL_CHUNK_SIZE):
+            read_chunks.append(document_ids[start : start + GET_ALL_CHUNK_SIZE])
+            chunk_field_paths.append(field_paths)
+    # Read chunks and batch commits are each issued concurrently.
+    with ThreadPoolExecutor(max_workers=MAX_FIRESTORE_WORKERS) as executor:
+        existing_documents: Dict[str, JsonObject] = {}
+        try:
+            for chunk in executor.map(_read_chunk, read_chunks, chunk_field_paths):
+                existing_documents.update(chunk)
+        except google_api_exceptions.PermissionDenied as exc:
+            raise SystemExit(_READ_DENIED_MESSAGE) from exc
+
+        pending: Dict[str, JsonObject] = {}
+        for path, data, digest, document_id in files:
+            existing_data = existing_documents.get(document_id)
+            # With several files per document, each run has to reapply all
+            # of them in order, so only single-source documents are skipped.
+            if (
+                files_per_document[document_id] == 1
+                and existing_data is not None
+                and existing_data.get("source_sha256") == digest
+            ):
+                print(f"{path.name} ist unverändert.")
+                continue
+            print(f"Synchronisiere {path.name}...")
+            # Files of the same document are merged in memory, so it is
+            # written once and later files see the earlier changes.
+            if document_id in merge_ids:
+                base = pending.get(document_id) or existing_data or {}
+            else:
+                base = pending.get(document_id) or {}
+            pending[document_id] = _merge_document(path, data, base, digest)
+
+        # Documents without sold results are merged by Firestore; new ones are
+        # created with ``set`` and existing ones get only the changed fields.
+        writes: List[Tuple[str, JsonObject, str]] = []
+        for document_id, payload_to_store in pending.items():
+            if document_id not in merge_ids:
+                writes.append((document_id, payload_to_store, "merge"))
+            elif document_id not in existing_documents:
+                writes.append((document_id, payload_to_store, "set"))
+            elif updates := _field_updates(db, existing_documents[document_id], payload_to_store):
+                writes.append((document_id, updates, "update"))
+        write_chunks = [
+            writes[start : start + MAX_BATCH_SIZE]
+            for start in range(0, len(writes), MAX_BATCH_SIZE)
+        ]
+        failed: List[str] = []
+        try:
+            for chunk_failures in executor.map(_commit_chunk, write_chunks):
+                failed.extend(chunk_failures)
+        except google_api_exceptions.PermissionDenied as exc:
+            raise SystemExit(_WRITE_DENIED_MESSAGE) from exc
+
+    if failed:
         raise SystemExit(
-            "Schreibzugriff auf Firestore verweigert. Stelle sicher, dass der Service-Account "
-            "mindestens die Rolle 'Datastore User' besitzt."
-        ) from exc
+            f"{len(failed)} Dokument(e) konnten nicht geschrieben werden: "
+            + ", ".join(failed)
+        )
 
 
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
@@ -179,9 +424,37 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
 
 def _build_firestore_client(
     *, project: str | None, credentials_path: Path | None
+) -> firestore.Client:
+    """Return a cached Firestore client, creating it on first use."""
+
+    key = (project, credentials_path, os.environ.get("GOOGLE_APPLICATION_CREDENTIALS"))
+    with _CLIENT_CACHE_LOCK:
+        client = _CLIENT_CACHE.get(key)
+        if client is None:
+            client = _create_firestore_client(
+                project=project, credentials_path=credentials_path
+            )
+            _CLIENT_CACHE[key] = client
+    return client
+
+
+def _create_firestore_client(
+    *, project: str | None, credentials_path: Path | None
 ) -> firestore.Client:
     """Create a Firestore client with additional credential validation."""
 
+    try:
+        from google.auth import exceptions as google_auth_exceptions
+        from google.cloud import firestore
+        from google.oauth2 import service_account
+    except ModuleNotFoundError as exc:  # pragma: no cover - import guard
+        raise SystemExit(
+            "Das Paket 'google-cloud-firestore' ist nicht installiert. "
+            "Installiere die Abhängigkeiten z. B. mit einem virtuellen Umfeld:\n"
+            "    python3 -m venv .venv && source .venv/bin/activate\n"
+            "    python -m pip install -r requirements.txt"
+        ) from exc
+
     def _validate_project_id(value: str, *, hint: str | None = None) -> str:
         candidate = value.strip()
         if not candidate:
@@ -222,8 +495,10 @@ def _build_firestore_client(
         if credentials_project:
             credentials_project = _validate_project_id(credentials_project)
 
-        credentials = service_account.Credentials.from_service_account_file(
-            str(expanded)
+        # Build the credentials from the already parsed file instead of
+        # letting the library read and parse it a second time.
+        credentials = service_account.Credentials.from_service_account_info(
+            credentials_info
         )
         normalized_project = (
             _validate_project_id(project, hint=credentials_project)
@@ -263,9 +538,7 @@ def main(argv: list[str] | None = None) -> int:
 
     db = _build_firestore_client(project=args.project, credentials_path=args.credentials)
 
-    for path, data in json_files:
-        print(f"Synchronisiere {path.name}...")
-        sync_file(db, path, data, collection=args.collection)
+    sync_files(db, json_files, collection=args.collection)
 
     print("Synchronisation abgeschlossen.")
     return 0